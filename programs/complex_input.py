@@ -7,6 +7,29 @@ import numpy as np
 # We use a mutable global variable to record each branch hit.
 current_coverage_map = {}
 
+# Characters that count as "special" for Branch 5 of process_input.
+SPECIAL_CHARS = frozenset("!@#$%^&*()")
+
+# Character class codes used by process_input.
+DIGIT_CLASS = 1
+SPECIAL_CLASS = 2
+
+
+def classify_char(ch):
+    """Return the class code of a single character (0 if it is neither a digit nor special)."""
+    if ch.isdigit():
+        return DIGIT_CLASS
+    if ch in SPECIAL_CHARS:
+        return SPECIAL_CLASS
+    return 0
+
+
+# Lookup table mapping every Latin-1 byte to its class code, for bytes.translate.
+CHAR_CLASS_TABLE = bytes(classify_char(chr(i)) for i in range(256))
+
+# Alphabet used to batch-generate pure random inputs.
+PRINTABLE_BYTES = np.frombuffer(string.printable.encode("ascii"), dtype=np.uint8)
+
 
 def record_coverage(branch):
     """Record coverage for the given branch in the global coverage map."""
@@ -35,6 +58,13 @@ def process_input(data):
         return result
     else:
         record_coverage("len_ok")
+        # Classify all characters through the lookup table; Branches 3, 5 and 9 read these.
+        try:
+            classes = data.encode("latin-1").translate(CHAR_CLASS_TABLE)
+        except UnicodeEncodeError:
+            classes = bytes(classify_char(ch) for ch in data)
+        digit_count = classes.count(DIGIT_CLASS)
+        has_special = SPECIAL_CLASS in classes
         # Branch 2: Check if the input starts with an alphabet.
         if data[0].isalpha():
             record_coverage("alpha_start")
@@ -43,7 +73,7 @@ def process_input(data):
             record_coverage("non_alpha_start")
             result += "Does not start with alpha. "
         # Branch 3: Check for any digits.
-        if any(ch.isdigit() for ch in data):
+        if digit_count:
             record_coverage("digit_found")
             result += "Has digit. "
         else:
@@ -60,7 +90,7 @@ def process_input(data):
             record_coverage("mixed_case")
             result += "Mixed case. "
         # Branch 5: Check for special characters.
-        if any(ch in "!@#$%^&*()" for ch in data):
+        if has_special:
             record_coverage("special_char")
             result += "Special char found. "
         else:
@@ -89,8 +119,7 @@ def process_input(data):
             record_coverage("no_greeting")
             result += "No greeting. "
         # Branch 9: Count digits and compare to a threshold.
-        count_digits = sum(1 for ch in data if ch.isdigit())
-        if count_digits > 2:
+        if digit_count > 2:
             record_coverage("many_digits")
             result += "Many digits. "
         else:
@@ -122,13 +151,11 @@ def helper_function_b(s):
 
 
 def compute_fibonacci(n):
-    """Compute the nth Fibonacci number recursively."""
-    if n <= 0:
-        return 0
-    elif n == 1:
-        return 1
-    else:
-        return compute_fibonacci(n - 1) + compute_fibonacci(n - 2)
+    """Compute the nth Fibonacci number iteratively."""
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b
+    return a
 
 
 def process_data_list(data_list):
@@ -164,9 +191,16 @@ def pure_random_fuzzing(iterations=1000):
     current_coverage_map = {}  # Reset coverage
     coverage_history = []
 
-    for _ in range(iterations):
-        length = random.randint(0, 20)
-        random_input = ''.join(random.choices(string.printable, k=length))
+    # Draw every input length and character up front, then slice per iteration.
+    # The generator is seeded from `random`, so random.seed() still makes runs reproducible.
+    rng = np.random.default_rng(random.getrandbits(64))
+    lengths = rng.integers(0, 21, size=iterations)
+    chars = rng.choice(PRINTABLE_BYTES, size=int(lengths.sum()))
+    all_inputs = chars.tobytes().decode("ascii")
+    offsets = np.concatenate(([0], np.cumsum(lengths))).tolist()
+
+    for i in range(iterations):
+        random_input = all_inputs[offsets[i]:offsets[i + 1]]
         try:
             process_input(random_input)
         except Exception:
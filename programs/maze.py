@@ -2,7 +2,9 @@ import random
 import string
 import matplotlib.pyplot as plt
 import numpy as np
+from array import array
 from collections import deque
+from functools import lru_cache
 
 # ----------------------------------------------------------------------
 # 1. GLOBAL COVERAGE TRACKING (BINARY)
@@ -27,9 +29,16 @@ def current_coverage_count():
 # ----------------------------------------------------------------------
 # 2. MAZE CLASS: PARSE, VALIDATE, SOLVE, VISUALIZE
 # ----------------------------------------------------------------------
+WALL = '#'
+START = 'S'
+FINISH = 'F'
+PATH_MARK = '*'
+VALID_CHARS = frozenset("#. SF")
+
+
 class Maze:
     def __init__(self, grid, start, finish):
-        self.grid = grid  # 2D list of characters
+        self.grid = grid  # one entry per row: a string, or a list of single characters
         self.start = start  # (row, col)
         self.finish = finish  # (row, col)
         self.rows = len(grid)
@@ -43,7 +52,6 @@ class Maze:
             raise ValueError("Maze input is empty.")
 
         lines = text.strip().split('\n')
-        grid = []
         start = finish = None
 
         expected_length = len(lines[0])
@@ -52,26 +60,36 @@ class Maze:
             if len(line) != expected_length:
                 record_coverage("non_rectangular")
                 raise ValueError("Maze is not rectangular.")
-            row = list(line)
-            for c, ch in enumerate(row):
-                if ch == 'S':
-                    if start is None:
-                        start = (r, c)
-                        record_coverage("found_start")
-                    else:
-                        record_coverage("multiple_start")
-                        raise ValueError("Multiple start points found.")
-                elif ch == 'F':
-                    if finish is None:
-                        finish = (r, c)
-                        record_coverage("found_finish")
-                    else:
-                        record_coverage("multiple_finish")
-                        raise ValueError("Multiple finish points found.")
-                elif ch not in ('#', '.', ' ', 'S', 'F'):
-                    # Mark invalid characters
-                    record_coverage("invalid_char")
-            grid.append(row)
+
+            # Scanning the row left to right stops at the first duplicate S or F;
+            # only the cells before that point count.
+            stop = expected_length
+            error = None
+            start_col = line.find(START)
+            if start_col != -1:
+                dup = start_col if start is not None else line.find(START, start_col + 1)
+                if dup != -1:
+                    stop = dup
+                    error = ("multiple_start", "Multiple start points found.")
+            finish_col = line.find(FINISH)
+            if finish_col != -1:
+                dup = finish_col if finish is not None else line.find(FINISH, finish_col + 1)
+                if dup != -1 and dup < stop:
+                    stop = dup
+                    error = ("multiple_finish", "Multiple finish points found.")
+
+            if start is None and start_col != -1 and start_col < stop:
+                start = (r, start_col)
+                record_coverage("found_start")
+            if finish is None and finish_col != -1 and finish_col < stop:
+                finish = (r, finish_col)
+                record_coverage("found_finish")
+            if not VALID_CHARS.issuperset(line[:stop]):
+                # Mark invalid characters
+                record_coverage("invalid_char")
+            if error is not None:
+                record_coverage(error[0])
+                raise ValueError(error[1])
 
         if start is None:
             record_coverage("no_start")
@@ -81,37 +99,51 @@ class Maze:
             raise ValueError("No finish point found in maze.")
 
         record_coverage("maze_parsed")
-        return cls(grid, start, finish)
+        return cls(lines, start, finish)
 
     def find_shortest_path(self):
         """Uses BFS to find the shortest path from start to finish (binary coverage)."""
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        queue = deque([(self.start, [self.start])])
-        visited = set([self.start])
+        # Cells are addressed by their flat index r * cols + c.
+        rows, cols = self.rows, self.cols
+        cells = "".join(map("".join, self.grid))
+        start = self.start[0] * cols + self.start[1]
+        finish = self.finish[0] * cols + self.finish[1]
+        visited = bytearray(rows * cols)
+        came_from = array('i', [-1]) * (rows * cols)
+        visited[start] = 1
+        queue = deque([start])
         record_coverage("bfs_start")
 
         while queue:
-            (r, c), path = queue.popleft()
-            if (r, c) == self.finish:
+            idx = queue.popleft()
+            if idx == finish:
                 record_coverage("path_found")
+                # Walk the parent pointers back to the start once.
+                path = []
+                while idx != -1:
+                    path.append(divmod(idx, cols))
+                    idx = came_from[idx]
+                path.reverse()
                 return path
-            for dr, dc in directions:
-                nr, nc = r + dr, c + dc
-                if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                    if (nr, nc) not in visited and self.grid[nr][nc] != '#':
-                        visited.add((nr, nc))
-                        queue.append(((nr, nc), path + [(nr, nc)]))
-                        record_coverage("queue_append")
+            r, c = divmod(idx, cols)
+            # Up, down, left, right, each paired with its bounds check
+            for nidx, inside in ((idx - cols, r > 0), (idx + cols, r < rows - 1),
+                                 (idx - 1, c > 0), (idx + 1, c < cols - 1)):
+                if inside and not visited[nidx] and cells[nidx] != WALL:
+                    visited[nidx] = 1
+                    came_from[nidx] = idx
+                    queue.append(nidx)
+                    record_coverage("queue_append")
         record_coverage("no_path")
         return None
 
     def visualize_path(self, path):
         """Return a string representation of the maze with the path overlaid."""
-        visual = [row.copy() for row in self.grid]
+        visual = [list(row) for row in self.grid]
         if path:
             for r, c in path:
-                if visual[r][c] not in ('S', 'F'):
-                    visual[r][c] = '*'
+                if visual[r][c] not in (START, FINISH):
+                    visual[r][c] = PATH_MARK
             record_coverage("visual_path")
         else:
             record_coverage("visual_no_path")
@@ -121,27 +153,33 @@ class Maze:
 # ----------------------------------------------------------------------
 # 3. FUZZING HELPERS
 # ----------------------------------------------------------------------
+# Random generator and weighted cell alphabet used to build random mazes.
+rng = np.random.default_rng(random.getrandbits(64))
+RANDOM_CELLS = np.frombuffer(b"#. ", dtype=np.uint8)
+RANDOM_CELL_WEIGHTS = [0.3, 0.6, 0.1]
+
+
+def seed_maze_rng():
+    """Reseed the maze generator from `random`, so random.seed() fixes the mazes too."""
+    global rng
+    rng = np.random.default_rng(random.getrandbits(64))
+
+
 def generate_random_maze_string():
     """Generates a random multi-line maze string with random dimensions."""
-    rows = random.randint(3, 10)
-    cols = random.randint(3, 10)
-    maze = []
-    # Random positions for S and F
-    start_row, start_col = random.randint(0, rows - 1), random.randint(0, cols - 1)
-    finish_row, finish_col = random.randint(0, rows - 1), random.randint(0, cols - 1)
-    for r in range(rows):
-        line_chars = []
-        for c in range(cols):
-            if (r, c) == (start_row, start_col):
-                line_chars.append('S')
-            elif (r, c) == (finish_row, finish_col):
-                line_chars.append('F')
-            else:
-                # Randomly choose wall or open space
-                ch = random.choices(['#', '.', ' '], weights=[30, 60, 10])[0]
-                line_chars.append(ch)
-        maze.append("".join(line_chars))
-    return "\n".join(maze)
+    rows = int(rng.integers(3, 11))
+    cols = int(rng.integers(3, 11))
+    # Randomly choose wall or open space for the whole grid at once; the
+    # extra last column holds the newline that ends each row
+    maze = np.empty((rows, cols + 1), dtype=np.uint8)
+    maze[:, :cols] = rng.choice(RANDOM_CELLS, size=(rows, cols), p=RANDOM_CELL_WEIGHTS)
+    maze[:, cols] = ord('\n')
+    # Random positions for S and F (S wins if both land on the same cell)
+    start_row, start_col = rng.integers(rows), rng.integers(cols)
+    finish_row, finish_col = rng.integers(rows), rng.integers(cols)
+    maze[finish_row, finish_col] = ord(FINISH)
+    maze[start_row, start_col] = ord(START)
+    return maze.tobytes()[:-1].decode("ascii")
 
 
 def mutate_maze_string(maze_str):
@@ -161,6 +199,27 @@ def mutate_maze_string(maze_str):
     return maze_str
 
 
+@lru_cache(maxsize=4096)
+def run_maze_input(text):
+    """
+    Parses and solves one maze string, returning the branches it covers.
+    Results are cached so mutated inputs the guided fuzzer sees again skip the
+    parse and BFS; callers replay the returned branches into the global coverage map.
+    """
+    global coverage_map
+    saved_map = coverage_map
+    coverage_map = {}
+    try:
+        m = Maze.from_string(text)
+        m.find_shortest_path()
+    except Exception:
+        record_coverage("exception")
+    finally:
+        branches = tuple(coverage_map)
+        coverage_map = saved_map
+    return branches
+
+
 # ----------------------------------------------------------------------
 # 4. FUZZING FUNCTIONS THAT TRACK COVERAGE OVER ITERATIONS
 # ----------------------------------------------------------------------
@@ -173,10 +232,12 @@ def pure_random_fuzzing(iterations=500):
     """
     global coverage_map
     coverage_map = {}  # Reset coverage
+    seed_maze_rng()
 
     coverage_history = []
     for _ in range(iterations):
         random_maze = generate_random_maze_string()
+        # Fresh random mazes almost never repeat, so they bypass the run_maze_input cache
         try:
             m = Maze.from_string(random_maze)
             m.find_shortest_path()
@@ -197,43 +258,27 @@ def coverage_guided_fuzzing(iterations=500):
     """
     global coverage_map
     coverage_map = {}  # Reset coverage
+    seed_maze_rng()
 
     # Start with a handful of seed mazes
     seeds = [generate_random_maze_string() for _ in range(5)]
-    total_covered_branches = set()
     coverage_history = []
 
     for _ in range(iterations):
         seed = random.choice(seeds)
         mutated = mutate_maze_string(seed)
 
-        # Temporarily store coverage for this run
-        temp_map = {}
-        saved_map = coverage_map
-        coverage_map = temp_map
+        # Coverage is binary, so the map only grows when a new branch is hit
+        covered_before = current_coverage_count()
+        for branch in run_maze_input(mutated):
+            record_coverage(branch)
 
-        try:
-            m = Maze.from_string(mutated)
-            m.find_shortest_path()
-        except Exception:
-            record_coverage("exception")
-
-        # Merge coverage from this iteration
-        newly_covered = set(temp_map.keys()) - total_covered_branches
-        if newly_covered:
+        if current_coverage_count() > covered_before:
             # Add mutated input if it yields new coverage
             seeds.append(mutated)
-            total_covered_branches.update(newly_covered)
-
-        # Once covered, always covered
-        for branch in temp_map:
-            saved_map[branch] = 1
-
-        coverage_map = saved_map
-        total_covered_branches = set(coverage_map.keys())
 
         # Record coverage size
-        coverage_history.append(len(total_covered_branches))
+        coverage_history.append(current_coverage_count())
 
     return coverage_map.copy(), coverage_history
 
@@ -1,12 +1,35 @@
 import random
+import re
 import string
+import sys
 import matplotlib.pyplot as plt
 import numpy as np
 
 # ========================
 # 1. GLOBAL COVERAGE
 # ========================
-coverage_map = {}  # branch_name -> 1 (binary coverage)
+# Every branch that can be recorded, in a fixed order that assigns its id.
+BRANCHES = (
+    # Lexer
+    "lexer_start", "lexer_print_kw", "lexer_ident", "lexer_number",
+    "lexer_plus", "lexer_minus", "lexer_star", "lexer_slash", "lexer_equals",
+    "lexer_lparen", "lexer_rparen", "lexer_semi", "lexer_unknown_symbol",
+    "lexer_end",
+    # Parser
+    "parse_program_start", "parse_program_end", "parse_stmt_assign",
+    "parse_stmt_print", "parse_stmt_error", "parse_assign_no_equals",
+    "parse_assign_no_semi", "parse_print_no_lparen", "parse_print_no_rparen",
+    "parse_print_no_semi", "parse_factor_no_rparen", "parse_factor_error",
+    # Interpreter
+    "interp_assign", "interp_print", "interp_unknown_stmt",
+    "interp_undefined_var", "interp_binop", "interp_div_zero",
+    "interp_unknown_op", "interp_unknown_expr",
+    # Fuzzers
+    "fuzz_exception",
+)
+BRANCH_IDS = {name: i for i, name in enumerate(BRANCHES)}
+coverage_bits = bytearray(len(BRANCHES))  # branch id -> 1 (binary coverage)
+covered_count = 0  # number of covered branches, kept in step with coverage_bits
 
 
 def record_coverage(branch):
@@ -14,14 +37,35 @@ def record_coverage(branch):
     Mark a given branch as covered (1).
     Once covered, it stays covered for this run.
     """
-    global coverage_map
-    coverage_map[branch] = 1
+    global covered_count
+    branch_id = BRANCH_IDS[branch]
+    if not coverage_bits[branch_id]:
+        coverage_bits[branch_id] = 1
+        covered_count += 1
+
+
+def current_coverage_count():
+    """Return how many distinct branches have been covered so far."""
+    return covered_count
+
+
+def reset_coverage():
+    """Start over with no branches covered."""
+    global coverage_bits, covered_count
+    coverage_bits = bytearray(len(BRANCHES))
+    covered_count = 0
 
 
 # ========================
 # 2. LEXER
 # ========================
+class ToyLangError(ValueError):
+    """Raised for programs that fail to lex, parse or run."""
+
+
 class Token:
+    __slots__ = ("ttype", "value")
+
     def __init__(self, ttype, value):
         self.ttype = ttype
         self.value = value
@@ -30,76 +74,63 @@ class Token:
         return f"Token({self.ttype}, {self.value})"
 
 
+EOF_TOKEN = Token("EOF", None)  # marks the end of every token list the parser sees
+
+
+# Skips leading whitespace, then captures the next token in one of four groups.
+TOKEN_RE = re.compile(r"""
+    \s*
+    (?:
+        ([-+*/=();])        # 1: single-character symbol
+      | ([^\W\d_]\w*)       # 2: identifier or keyword
+      | (\d+)               # 3: number
+      | (\S)                # 4: anything else is an unknown symbol
+    )
+""", re.VERBOSE)
+UNKNOWN_GROUP = 4
+
+# Tokens are never modified, so symbols and the print keyword share one instance each.
+# Single-character tokens: symbol -> (token, coverage branch)
+SYMBOL_TOKENS = {
+    '+': (Token("PLUS", '+'), "lexer_plus"),
+    '-': (Token("MINUS", '-'), "lexer_minus"),
+    '*': (Token("STAR", '*'), "lexer_star"),
+    '/': (Token("SLASH", '/'), "lexer_slash"),
+    '=': (Token("EQUALS", '='), "lexer_equals"),
+    '(': (Token("LPAREN", '('), "lexer_lparen"),
+    ')': (Token("RPAREN", ')'), "lexer_rparen"),
+    ';': (Token("SEMI", ';'), "lexer_semi"),
+}
+PRINT_TOKEN = Token("PRINT", "print")
+
+
 def tokenize(code):
     """
     Convert a string of code into a list of tokens.
     """
     record_coverage("lexer_start")
     tokens = []
-    i = 0
-    while i < len(code):
-        c = code[i]
-
-        if c.isspace():
-            i += 1
-            continue
-
-        if c.isalpha():
-            # Collect identifier or keyword
-            start = i
-            while i < len(code) and (code[i].isalnum() or code[i] == '_'):
-                i += 1
-            ident = code[start:i]
-            if ident == "print":
-                tokens.append(Token("PRINT", ident))
+    for symbol, word, number, unknown in TOKEN_RE.findall(code):
+        if symbol:
+            token, branch = SYMBOL_TOKENS[symbol]
+            tokens.append(token)
+            record_coverage(branch)
+        elif word:
+            if word == "print":
+                tokens.append(PRINT_TOKEN)
                 record_coverage("lexer_print_kw")
             else:
-                tokens.append(Token("IDENT", ident))
+                tokens.append(Token("IDENT", word))
                 record_coverage("lexer_ident")
-            continue
-
-        if c.isdigit():
-            # Collect number
-            start = i
-            while i < len(code) and code[i].isdigit():
-                i += 1
-            num_str = code[start:i]
-            tokens.append(Token("NUMBER", int(num_str)))
+        elif number:
+            tokens.append(Token("NUMBER", int(number)))
             record_coverage("lexer_number")
-            continue
-
-        if c in "+-*/=();":
-            # Single-character tokens
-            if c == '+':
-                tokens.append(Token("PLUS", c))
-                record_coverage("lexer_plus")
-            elif c == '-':
-                tokens.append(Token("MINUS", c))
-                record_coverage("lexer_minus")
-            elif c == '*':
-                tokens.append(Token("STAR", c))
-                record_coverage("lexer_star")
-            elif c == '/':
-                tokens.append(Token("SLASH", c))
-                record_coverage("lexer_slash")
-            elif c == '=':
-                tokens.append(Token("EQUALS", c))
-                record_coverage("lexer_equals")
-            elif c == '(':
-                tokens.append(Token("LPAREN", c))
-                record_coverage("lexer_lparen")
-            elif c == ')':
-                tokens.append(Token("RPAREN", c))
-                record_coverage("lexer_rparen")
-            elif c == ';':
-                tokens.append(Token("SEMI", c))
-                record_coverage("lexer_semi")
-            i += 1
-            continue
-
-        # If we reach here, it's an unknown symbol
-        record_coverage("lexer_unknown_symbol")
-        raise ValueError(f"Unknown symbol '{c}' at position {i}")
+        else:
+            # If we reach here, it's an unknown symbol
+            record_coverage("lexer_unknown_symbol")
+            position = next(m.start(UNKNOWN_GROUP) for m in TOKEN_RE.finditer(code)
+                            if m.lastindex == UNKNOWN_GROUP)
+            raise ToyLangError(f"Unknown symbol '{unknown}' at position {position}")
 
     record_coverage("lexer_end")
     return tokens
@@ -108,15 +139,22 @@ def tokenize(code):
 # ========================
 # 3. PARSER (Recursive-Descent)
 # ========================
+# AST node kinds and binary operators are small ints, so the interpreter
+# dispatches on integer compares instead of string tags.
+NODE_PROGRAM, NODE_ASSIGN, NODE_PRINT, NODE_NUMBER, NODE_IDENT, NODE_BINOP = range(6)
+OP_ADD, OP_SUB, OP_MUL, OP_DIV = range(4)
+BINARY_OPS = {"PLUS": OP_ADD, "MINUS": OP_SUB, "STAR": OP_MUL, "SLASH": OP_DIV}
+
+
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
+        # The trailing EOF token lets lookups index tokens[pos] without a bounds check;
+        # the parser never advances past it.
+        self.tokens = tokens + [EOF_TOKEN]
         self.pos = 0
 
     def current_token(self):
-        if self.pos < len(self.tokens):
-            return self.tokens[self.pos]
-        return Token("EOF", None)
+        return self.tokens[self.pos]
 
     def advance(self):
         self.pos += 1
@@ -131,7 +169,7 @@ class Parser:
             stmt = self.parse_statement()
             statements.append(stmt)
         record_coverage("parse_program_end")
-        return ("PROGRAM", statements)
+        return (NODE_PROGRAM, statements)
 
     def parse_statement(self):
         """
@@ -146,7 +184,7 @@ class Parser:
             return self.parse_print_stmt()
         else:
             record_coverage("parse_stmt_error")
-            raise ValueError(f"Unexpected token {tok}")
+            raise ToyLangError(f"Unexpected token {tok}")
 
     def parse_assign_stmt(self):
         """
@@ -157,15 +195,15 @@ class Parser:
         eq_token = self.current_token()
         if eq_token.ttype != "EQUALS":
             record_coverage("parse_assign_no_equals")
-            raise ValueError("Expected '=' in assignment.")
+            raise ToyLangError("Expected '=' in assignment.")
         self.advance()  # consume '='
         expr_node = self.parse_expr()
         semi_token = self.current_token()
         if semi_token.ttype != "SEMI":
             record_coverage("parse_assign_no_semi")
-            raise ValueError("Expected ';' after assignment.")
+            raise ToyLangError("Expected ';' after assignment.")
         self.advance()  # consume ';'
-        return ("ASSIGN", ident_token.value, expr_node)
+        return (NODE_ASSIGN, ident_token.value, expr_node)
 
     def parse_print_stmt(self):
         """
@@ -175,68 +213,73 @@ class Parser:
         lp = self.current_token()
         if lp.ttype != "LPAREN":
             record_coverage("parse_print_no_lparen")
-            raise ValueError("Expected '(' after 'print'.")
+            raise ToyLangError("Expected '(' after 'print'.")
         self.advance()  # consume '('
         expr_node = self.parse_expr()
         rp = self.current_token()
         if rp.ttype != "RPAREN":
             record_coverage("parse_print_no_rparen")
-            raise ValueError("Expected ')' after expression in print.")
+            raise ToyLangError("Expected ')' after expression in print.")
         self.advance()  # consume ')'
         semi = self.current_token()
         if semi.ttype != "SEMI":
             record_coverage("parse_print_no_semi")
-            raise ValueError("Expected ';' after print statement.")
+            raise ToyLangError("Expected ';' after print statement.")
         self.advance()  # consume ';'
-        return ("PRINT", expr_node)
+        return (NODE_PRINT, expr_node)
 
     def parse_expr(self):
         """
         expr -> term (('+' | '-') term)*
         """
+        tokens = self.tokens
         left = self.parse_term()
-        while self.current_token().ttype in ("PLUS", "MINUS"):
-            op = self.current_token()
-            self.advance()
+        op = tokens[self.pos]
+        while op.ttype in ("PLUS", "MINUS"):
+            self.pos += 1
             right = self.parse_term()
-            left = ("BINOP", op.ttype, left, right)
+            left = (NODE_BINOP, BINARY_OPS[op.ttype], left, right)
+            op = tokens[self.pos]
         return left
 
     def parse_term(self):
         """
         term -> factor (('*' | '/') factor)*
         """
+        tokens = self.tokens
         left = self.parse_factor()
-        while self.current_token().ttype in ("STAR", "SLASH"):
-            op = self.current_token()
-            self.advance()
+        op = tokens[self.pos]
+        while op.ttype in ("STAR", "SLASH"):
+            self.pos += 1
             right = self.parse_factor()
-            left = ("BINOP", op.ttype, left, right)
+            left = (NODE_BINOP, BINARY_OPS[op.ttype], left, right)
+            op = tokens[self.pos]
         return left
 
     def parse_factor(self):
         """
         factor -> NUMBER | IDENT | '(' expr ')'
         """
-        tok = self.current_token()
-        if tok.ttype == "NUMBER":
-            self.advance()
-            return ("NUMBER", tok.value)
-        elif tok.ttype == "IDENT":
-            self.advance()
-            return ("IDENT", tok.value)
-        elif tok.ttype == "LPAREN":
-            self.advance()
+        tokens = self.tokens
+        tok = tokens[self.pos]
+        ttype = tok.ttype
+        if ttype == "NUMBER":
+            self.pos += 1
+            return (NODE_NUMBER, tok.value)
+        elif ttype == "IDENT":
+            self.pos += 1
+            return (NODE_IDENT, tok.value)
+        elif ttype == "LPAREN":
+            self.pos += 1
             inner_expr = self.parse_expr()
-            rp = self.current_token()
-            if rp.ttype != "RPAREN":
+            if tokens[self.pos].ttype != "RPAREN":
                 record_coverage("parse_factor_no_rparen")
-                raise ValueError("Expected ')' after expression.")
-            self.advance()
+                raise ToyLangError("Expected ')' after expression.")
+            self.pos += 1
             return inner_expr
         else:
             record_coverage("parse_factor_error")
-            raise ValueError(f"Unexpected token in factor: {tok}")
+            raise ToyLangError(f"Unexpected token in factor: {tok}")
 
 
 # ========================
@@ -247,76 +290,109 @@ class Interpreter:
         self.variables = {}  # name -> int
 
     def eval_program(self, node):
-        # node is ("PROGRAM", [stmt1, stmt2, ...])
+        # node is (NODE_PROGRAM, [stmt1, stmt2, ...])
         for stmt in node[1]:
             self.eval_statement(stmt)
 
     def eval_statement(self, stmt):
         stype = stmt[0]
-        if stype == "ASSIGN":
+        if stype == NODE_ASSIGN:
             record_coverage("interp_assign")
-            # stmt = ("ASSIGN", varname, expr)
+            # stmt = (NODE_ASSIGN, varname, expr)
             varname = stmt[1]
             expr_node = stmt[2]
             value = self.eval_expr(expr_node)
             self.variables[varname] = value
-        elif stype == "PRINT":
+        elif stype == NODE_PRINT:
             record_coverage("interp_print")
-            # stmt = ("PRINT", expr_node)
+            # stmt = (NODE_PRINT, expr_node)
             expr_node = stmt[1]
             value = self.eval_expr(expr_node)
             print(value)
         else:
             record_coverage("interp_unknown_stmt")
-            raise ValueError(f"Unknown statement type: {stype}")
+            raise ToyLangError(f"Unknown statement type: {stype}")
 
     def eval_expr(self, expr):
         etype = expr[0]
-        if etype == "NUMBER":
+        if etype == NODE_NUMBER:
             return expr[1]
-        elif etype == "IDENT":
+        elif etype == NODE_IDENT:
             varname = expr[1]
             if varname not in self.variables:
                 record_coverage("interp_undefined_var")
-                raise ValueError(f"Undefined variable '{varname}'")
+                raise ToyLangError(f"Undefined variable '{varname}'")
             return self.variables[varname]
-        elif etype == "BINOP":
+        elif etype == NODE_BINOP:
             record_coverage("interp_binop")
-            # expr = ("BINOP", op, left, right)
+            # expr = (NODE_BINOP, op, left, right)
             op = expr[1]
             left_val = self.eval_expr(expr[2])
             right_val = self.eval_expr(expr[3])
-            if op == "PLUS":
+            if op == OP_ADD:
                 return left_val + right_val
-            elif op == "MINUS":
+            elif op == OP_SUB:
                 return left_val - right_val
-            elif op == "STAR":
+            elif op == OP_MUL:
                 return left_val * right_val
-            elif op == "SLASH":
+            elif op == OP_DIV:
                 if right_val == 0:
                     record_coverage("interp_div_zero")
-                    raise ValueError("Division by zero")
+                    raise ToyLangError("Division by zero")
                 return left_val // right_val
             else:
                 record_coverage("interp_unknown_op")
-                raise ValueError(f"Unknown operator {op}")
+                raise ToyLangError(f"Unknown operator {op}")
         else:
             record_coverage("interp_unknown_expr")
-            raise ValueError(f"Unknown expression type {etype}")
+            raise ToyLangError(f"Unknown expression type {etype}")
 
 
 # ========================
 # 5. FUZZING
 # ========================
+# Characters the fuzzers draw from: letters, digits, newline and a subset of punctuation.
+CODE_CHARS = tuple(string.ascii_letters + string.digits + "+-*/=(); \n")
+
+
 def random_code_string(max_len=50):
     """
     Generates a random string of up to max_len characters.
     May contain random letters, digits, punctuation, etc.
     """
     length = random.randint(0, max_len)
-    # We'll allow newline and a subset of punctuation
-    chars = string.ascii_letters + string.digits + "+-*/=(); \n"
-    return ''.join(random.choice(chars) for _ in range(length))
+    return ''.join(random.choices(CODE_CHARS, k=length))
+
+
+# Statement shapes that template_code_string fills in, so the programs it
+# generates get past the lexer and parser and reach the interpreter.
+STATEMENT_TEMPLATES = (
+    "{v}={n};",
+    "print({v});",
+    "{v}={v}+{n};",
+    "{v}={w}-{n};",
+    "{v}={w}*{v};",
+    "{v}=({w}+{n})/{n};",
+    "print({v}*{n}-{w});",
+)
+TEMPLATE_VARIABLES = "abcxyz"
+TEMPLATE_PROBABILITY = 0.7  # share of template programs when pure random fuzzing uses templates
+
+
+def template_code_string(max_len=50):
+    """
+    Generates up to 3 whole statements built from STATEMENT_TEMPLATES,
+    at most max_len characters long in total.
+    """
+    code = ''
+    for template in random.choices(STATEMENT_TEMPLATES, k=random.randint(1, 3)):
+        statement = template.format(v=random.choice(TEMPLATE_VARIABLES),
+                                    w=random.choice(TEMPLATE_VARIABLES),
+                                    n=random.randint(0, 99))
+        # Leave out statements that would not fit rather than cutting them short
+        if len(code) + len(statement) <= max_len:
+            code += statement
+    return code
 
 
 def parse_and_run(code):
@@ -330,21 +406,25 @@ def parse_and_run(code):
     interp.eval_program(program_ast)
 
 
-def pure_random_fuzzing(iterations=500):
+def pure_random_fuzzing(iterations=500, use_templates=False):
     """
     Performs pure random fuzzing on the toy language interpreter.
-    Returns a list of coverage counts (len of coverage_map) after each iteration.
+    With use_templates, TEMPLATE_PROBABILITY of the inputs come from
+    template_code_string instead of uniformly random characters.
+    Returns an array of coverage counts (covered branches) after each iteration.
     """
-    global coverage_map
-    coverage_map = {}
-    coverage_history = []
+    reset_coverage()
+    coverage_history = np.empty(iterations, dtype=np.int32)
     for i in range(iterations):
-        code = random_code_string(max_len=50)
+        if use_templates and random.random() < TEMPLATE_PROBABILITY:
+            code = template_code_string(max_len=50)
+        else:
+            code = random_code_string(max_len=50)
         try:
             parse_and_run(code)
         except Exception:
             record_coverage("fuzz_exception")
-        coverage_history.append(len(coverage_map))
+        coverage_history[i] = covered_count
     return coverage_history
 
 
@@ -356,23 +436,21 @@ def mutate_string(s):
         return random_code_string(10)
     mutation_type = random.choice(["insert", "delete", "replace"])
     pos = random.randint(0, len(s) - 1)
-    chars = string.ascii_letters + string.digits + "+-*/=(); \n"
     if mutation_type == "insert":
-        return s[:pos] + random.choice(chars) + s[pos:]
+        return s[:pos] + random.choice(CODE_CHARS) + s[pos:]
     elif mutation_type == "delete":
         return s[:pos] + s[pos + 1:]
     else:  # replace
-        return s[:pos] + random.choice(chars) + s[pos + 1:]
+        return s[:pos] + random.choice(CODE_CHARS) + s[pos + 1:]
 
 
 def coverage_guided_fuzzing(iterations=500):
     """
     Performs coverage-guided fuzzing on the toy language interpreter.
-    Returns a list of coverage counts (len of coverage_map) over iterations.
+    Returns an array of coverage counts (covered branches) over iterations.
     """
-    global coverage_map
-    coverage_map = {}
-    coverage_history = []
+    reset_coverage()
+    coverage_history = np.empty(iterations, dtype=np.int32)
 
     # Seed with some small valid or semi-valid programs
     seeds = [
@@ -381,34 +459,22 @@ def coverage_guided_fuzzing(iterations=500):
         "print(1+2*3);",
         "abc=123;print(abc);"
     ]
-    covered_branches = set()
 
     for i in range(iterations):
         seed = random.choice(seeds)
         mutated = mutate_string(seed)
 
-        # Temporarily track coverage for this iteration
-        temp_map = {}
-        saved_map = coverage_map
-        coverage_map = temp_map
-
+        # Coverage is binary, so the count only grows when a new branch is hit
+        covered_before = covered_count
         try:
             parse_and_run(mutated)
         except Exception:
             record_coverage("fuzz_exception")
 
-        # Find newly covered branches
-        new_branches = set(temp_map.keys()) - covered_branches
-        if new_branches:
+        if covered_count > covered_before:
             seeds.append(mutated)
-            covered_branches.update(new_branches)
 
-        # Merge the temporary coverage into the main coverage map (binary)
-        for br in temp_map:
-            saved_map[br] = 1
-
-        coverage_map = saved_map
-        coverage_history.append(len(coverage_map))
+        coverage_history[i] = covered_count
 
     return coverage_history
 
@@ -435,7 +501,10 @@ def plot_coverage_evolution(coverage_random, coverage_guided):
 # ========================
 # 7. MAIN
 # ========================
-def main():
+PROFILE_REPORT = "toy_lang_profile.html"  # written by `python toy_lang.py --profile`
+
+
+def main(profile=False):
     # Quick demonstration of the interpreter on a small code sample
     demo_code = "x=2; y=3; print(x*y);"
     print("=== Demo Code ===")
@@ -445,6 +514,12 @@ def main():
     except Exception as e:
         print("Error:", e)
 
+    if profile:
+        # Sampling profiler: far less overhead than cProfile on many small calls
+        from pyinstrument import Profiler
+        profiler = Profiler(interval=0.001)
+        profiler.start()
+
     # Run fuzzing
     print("\n=== Running Pure Random Fuzzing ===")
     coverage_history_random = pure_random_fuzzing(iterations=300)
@@ -454,10 +529,15 @@ def main():
     coverage_history_guided = coverage_guided_fuzzing(iterations=300)
     print("Final coverage with Coverage-Guided:", coverage_history_guided[-1])
 
+    if profile:
+        profiler.stop()
+        profiler.write_html(PROFILE_REPORT)
+        print("Profile written to", PROFILE_REPORT)
+
     # Plot
     print("\n=== Plotting Coverage Evolution ===")
     plot_coverage_evolution(coverage_history_random, coverage_history_guided)
 
 
 if __name__ == "__main__":
-    main()
+    main(profile="--profile" in sys.argv[1:])